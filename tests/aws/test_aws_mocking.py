@@ -5,7 +5,7 @@ This module tests AWS service interactions using moto to mock AWS services
 without requiring actual AWS credentials or resources.
 """
 
-from unittest.mock import patch
+import os
 
 # Note: moto will be imported only when dependencies are installed
 # For now, we'll create the test structure without the actual moto imports
@@ -14,70 +14,67 @@ from unittest.mock import patch
 class TestS3Integration:
     """Test S3 service integration."""
 
-    def test_s3_bucket_operations_mock(self):
+    def test_s3_bucket_operations_mock(self, patched_boto_client):
         """Test S3 bucket operations using mocking."""
         # This test will be implemented once moto is available
         # For now, we create a basic mock test structure
 
-        with patch("boto3.client") as mock_client:
-            # Mock S3 client
-            mock_s3 = mock_client.return_value
-            mock_s3.create_bucket.return_value = {"Location": "us-east-1"}
-            mock_s3.list_buckets.return_value = {
-                "Buckets": [{"Name": "test-bucket", "CreationDate": "2023-01-01"}]
-            }
+        # Mock S3 client
+        mock_s3 = patched_boto_client.return_value
+        mock_s3.create_bucket.return_value = {"Location": "us-east-1"}
+        mock_s3.list_buckets.return_value = {
+            "Buckets": [{"Name": "test-bucket", "CreationDate": "2023-01-01"}]
+        }
 
-            # Test bucket creation
-            result = mock_s3.create_bucket(Bucket="test-bucket")
-            assert result["Location"] == "us-east-1"
+        # Test bucket creation
+        result = mock_s3.create_bucket(Bucket="test-bucket")
+        assert result["Location"] == "us-east-1"
 
-            # Test bucket listing
-            buckets = mock_s3.list_buckets()
-            assert len(buckets["Buckets"]) == 1
-            assert buckets["Buckets"][0]["Name"] == "test-bucket"
+        # Test bucket listing
+        buckets = mock_s3.list_buckets()
+        assert len(buckets["Buckets"]) == 1
+        assert buckets["Buckets"][0]["Name"] == "test-bucket"
 
 
 class TestSageMakerIntegration:
     """Test SageMaker service integration."""
 
-    def test_sagemaker_training_job_mock(self):
+    def test_sagemaker_training_job_mock(self, patched_boto_client):
         """Test SageMaker training job using mocking."""
-
-        with patch("boto3.client") as mock_client:
-            # Mock SageMaker client
-            mock_sagemaker = mock_client.return_value
-            mock_sagemaker.create_training_job.return_value = {
-                "TrainingJobArn": "arn:aws:sagemaker:us-east-1:123456789012:training-job/test-job"
-            }
-            mock_sagemaker.describe_training_job.return_value = {
-                "TrainingJobStatus": "InProgress",
-                "TrainingJobName": "test-job",
-            }
-
-            # Test training job creation
-            result = mock_sagemaker.create_training_job(
-                TrainingJobName="test-job",
-                AlgorithmSpecification={
-                    "TrainingImage": "test-image",
-                    "TrainingInputMode": "File",
-                },
-                RoleArn="arn:aws:iam::123456789012:role/test-role",
-                OutputDataConfig={"S3OutputPath": "s3://test-bucket/output"},
-            )
-            assert "TrainingJobArn" in result
-
-            # Test training job description
-            status = mock_sagemaker.describe_training_job(TrainingJobName="test-job")
-            assert status["TrainingJobStatus"] == "InProgress"
+        # Mock SageMaker client
+        mock_sagemaker = patched_boto_client.return_value
+        mock_sagemaker.create_training_job.return_value = {
+            "TrainingJobArn": "arn:aws:sagemaker:us-east-1:123456789012:training-job/test-job"
+        }
+        mock_sagemaker.describe_training_job.return_value = {
+            "TrainingJobStatus": "InProgress",
+            "TrainingJobName": "test-job",
+        }
+
+        # Test training job creation
+        result = mock_sagemaker.create_training_job(
+            TrainingJobName="test-job",
+            AlgorithmSpecification={
+                "TrainingImage": "test-image",
+                "TrainingInputMode": "File",
+            },
+            RoleArn="arn:aws:iam::123456789012:role/test-role",
+            OutputDataConfig={"S3OutputPath": "s3://test-bucket/output"},
+        )
+        assert "TrainingJobArn" in result
+
+        # Test training job description
+        status = mock_sagemaker.describe_training_job(TrainingJobName="test-job")
+        assert status["TrainingJobStatus"] == "InProgress"
 
 
 def test_aws_credentials_setup():
     """Test that AWS credentials are properly set up for testing."""
-    import os
-
     # Check that test credentials are set
     assert os.environ.get("AWS_ACCESS_KEY_ID") == "testing"
     assert os.environ.get("AWS_SECRET_ACCESS_KEY") == "testing"
+    assert os.environ.get("AWS_SECURITY_TOKEN") == "testing"
+    assert os.environ.get("AWS_SESSION_TOKEN") == "testing"
     assert os.environ.get("AWS_DEFAULT_REGION") == "us-east-1"
 
 
@@ -6,9 +6,13 @@ This module configures pytest and provides global fixtures for all tests.
 
 import os
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
+# Project root, resolved once at import
+_ROOT = Path(__file__).resolve().parent.parent
+
 
 # Configure pytest
 def pytest_configure(config):
@@ -26,22 +30,43 @@ def pytest_configure(config):
     config.addinivalue_line("markers", "model: marks tests that require model files")
 
 
+# Markers applied to every test under the given tests/ subdirectory
+_DIRECTORY_MARKERS = {
+    "unit": "unit",
+    "integration": "integration",
+    "infrastructure": "integration",
+    "aws": "aws",
+}
+
+
+def pytest_collection_modifyitems(items):
+    """Mark tests by the directory they live in (e.g. tests/aws -> aws)."""
+    tests_dir = _ROOT / "tests"
+    for item in items:
+        if tests_dir not in item.path.parents:
+            continue
+        for directory in item.path.relative_to(tests_dir).parts[:-1]:
+            marker = _DIRECTORY_MARKERS.get(directory)
+            if marker:
+                item.add_marker(marker)
+
+
+# Canonical environment for the test session (dummy credentials for moto)
+_TEST_ENV = {
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "AWS_SECURITY_TOKEN": "testing",
+    "AWS_SESSION_TOKEN": "testing",
+    "AWS_DEFAULT_REGION": "us-east-1",
+}
+
+
 @pytest.fixture(scope="session", autouse=True)
 def setup_test_environment():
     """Set up test environment for the entire test session."""
-    # Set test environment variables
-    test_env = {
-        "AWS_ACCESS_KEY_ID": "testing",
-        "AWS_SECRET_ACCESS_KEY": "testing",
-        "AWS_SECURITY_TOKEN": "testing",
-        "AWS_SESSION_TOKEN": "testing",
-        "AWS_DEFAULT_REGION": "us-east-1",
-        "PYTHONPATH": str(Path(__file__).parent / "src"),
-    }
-
     # Store original values to restore later
     original_env = {}
-    for key, value in test_env.items():
+    for key, value in _TEST_ENV.items():
         original_env[key] = os.environ.get(key)
         os.environ[key] = value
 
@@ -55,19 +80,94 @@ def setup_test_environment():
             os.environ[key] = value
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def project_root():
     """Get the project root directory."""
-    return Path(__file__).parent.parent
+    return _ROOT
 
 
-@pytest.fixture
-def src_dir(project_root):
+@pytest.fixture(scope="session")
+def src_dir():
     """Get the src directory."""
-    return project_root / "src"
+    return _ROOT / "src"
 
 
-@pytest.fixture
-def tests_dir(project_root):
+@pytest.fixture(scope="session")
+def tests_dir():
     """Get the tests directory."""
-    return project_root / "tests"
+    return _ROOT / "tests"
+
+
+@pytest.fixture(scope="session")
+def tf_sources(project_root):
+    """Read every Terraform file in infra/ once per session, keyed by file name."""
+    infra_dir = project_root / "infra"
+    if not infra_dir.exists():
+        return {}
+    return {path.name: path.read_text() for path in infra_dir.glob("*.tf")}
+
+
+@pytest.fixture
+def patched_boto_client():
+    """Patch boto3.client for the duration of a test and yield the mock."""
+    with patch("boto3.client") as mock_client:
+        yield mock_client
+
+
+def _normalize_hcl(value):
+    """Strip python-hcl2 quoting and block markers from a parsed HCL value.
+
+    python-hcl2 8.x keeps the quotes of string literals (``'"dev"'``) and
+    renders expressions as ``"${...}"``; only the literal quotes are removed.
+    """
+    if isinstance(value, dict):
+        return {
+            _normalize_hcl(key): _normalize_hcl(item)
+            for key, item in value.items()
+            if key not in ("__is_block__", "__comments__")
+        }
+    if isinstance(value, list):
+        return [_normalize_hcl(item) for item in value]
+    if isinstance(value, str) and len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1]
+    return value
+
+
+@pytest.fixture(scope="session")
+def tf_config(tf_sources):
+    """Parse the Terraform sources once per session into a merged configuration.
+
+    Labelled blocks are keyed by their labels, e.g.
+    ``tf_config["resource"]["aws_s3_bucket"]["intents_raw"]`` and
+    ``tf_config["variable"]["environment"]``; locals are merged into one dict.
+    Providers map to a list of blocks, since aliased providers share a name.
+    """
+    hcl2 = pytest.importorskip("hcl2", minversion="8.1")
+
+    def merge(target, name, body, file_name):
+        # Terraform rejects duplicates, so a repeat means a broken configuration
+        if name in target:
+            pytest.fail(f"Duplicate Terraform definition {name!r} in {file_name}")
+        target[name] = body
+
+    config = {"resource": {}, "data": {}, "variable": {}, "provider": {}, "locals": {}}
+    for file_name, content in tf_sources.items():
+        parsed = _normalize_hcl(hcl2.loads(content))
+        for block_type in ("resource", "data"):
+            for block in parsed.get(block_type, []):
+                for kind, named in block.items():
+                    for name, body in named.items():
+                        merge(
+                            config[block_type].setdefault(kind, {}),
+                            name,
+                            body,
+                            file_name,
+                        )
+        for block_type in ("variable", "locals"):
+            for block in parsed.get(block_type, []):
+                for name, body in block.items():
+                    merge(config[block_type], name, body, file_name)
+        for block in parsed.get("provider", []):
+            for name, body in block.items():
+                config["provider"].setdefault(name, []).append(body)
+    return config
@@ -5,15 +5,19 @@ This module provides common fixtures, mock objects, and utility functions
 used across different test modules.
 """
 
-import os
+import functools
 import tempfile
-from collections.abc import Generator
+from collections.abc import Generator, Mapping
 from pathlib import Path
+from types import MappingProxyType
 from typing import Any
 from unittest.mock import Mock
 
 import pytest
 
+# Canned MockModel.predict output, shared rather than rebuilt per call
+_PREDICTIONS = ("intent_1", "intent_2", "intent_3")
+
 
 @pytest.fixture
 def temp_dir() -> Generator[Path, None, None]:
@@ -22,14 +26,22 @@ def temp_dir() -> Generator[Path, None, None]:
         yield Path(tmp_dir)
 
 
-@pytest.fixture
-def sample_config() -> dict[str, Any]:
-    """Sample configuration for tests."""
-    return {
-        "model": {"name": "test-model", "version": "1.0.0", "type": "classification"},
-        "training": {"batch_size": 16, "learning_rate": 0.001, "epochs": 5},
-        "aws": {"region": "us-east-1", "s3_bucket": "test-bucket"},
-    }
+@pytest.fixture(scope="session")
+def sample_config() -> Mapping[str, Any]:
+    """Sample configuration for tests (read-only, shared across the session)."""
+    return MappingProxyType(
+        {
+            "model": MappingProxyType(
+                {"name": "test-model", "version": "1.0.0", "type": "classification"}
+            ),
+            "training": MappingProxyType(
+                {"batch_size": 16, "learning_rate": 0.001, "epochs": 5}
+            ),
+            "aws": MappingProxyType(
+                {"region": "us-east-1", "s3_bucket": "test-bucket"}
+            ),
+        }
+    )
 
 
 @pytest.fixture
@@ -55,23 +67,19 @@ def mock_sagemaker_client():
     return mock_client
 
 
-@pytest.fixture(autouse=True)
-def setup_test_environment(monkeypatch):
-    """Set up test environment variables."""
-    test_env = {
-        "AWS_ACCESS_KEY_ID": "test_access_key",
-        "AWS_SECRET_ACCESS_KEY": "test_secret_key",
-        "AWS_DEFAULT_REGION": "us-east-1",
-        "PYTHONPATH": os.pathsep.join(
-            [
-                str(Path(__file__).parent.parent / "src"),
-                os.environ.get("PYTHONPATH", ""),
-            ]
-        ),
-    }
+@functools.cache
+def _cached_client(service: str, region: str = "us-east-1"):
+    """Build a boto3 client once per (service, region) and reuse it."""
+    boto3 = pytest.importorskip("boto3")
+    return boto3.session.Session().client(service, region_name=region)
+
 
-    for key, value in test_env.items():
-        monkeypatch.setenv(key, value)
+@pytest.fixture(scope="session")
+def aws_clients() -> Generator[dict[str, Any], None, None]:
+    """Pre-built boto3 clients backed by moto, keyed by service."""
+    moto = pytest.importorskip("moto")
+    with moto.mock_aws():
+        yield {service: _cached_client(service) for service in ("s3", "sagemaker")}
 
 
 class MockModel:
@@ -80,6 +88,7 @@ class MockModel:
     def __init__(self, name: str = "test-model"):
         self.name = name
         self.is_trained = False
+        self.saved_paths: list[str] = []
 
     def train(self, _data):
         """Mock training method."""
@@ -90,12 +99,11 @@ class MockModel:
         """Mock prediction method."""
         if not self.is_trained:
             raise ValueError("Model must be trained before prediction")
-        return ["intent_1", "intent_2", "intent_3"]
+        return _PREDICTIONS
 
     def save(self, path: str):
-        """Mock save method."""
-        Path(path).mkdir(parents=True, exist_ok=True)
-        (Path(path) / "model.pkl").touch()
+        """Mock save method; records the path instead of touching the filesystem."""
+        self.saved_paths.append(path)
 
 
 @pytest.fixture
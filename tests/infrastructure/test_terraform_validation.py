@@ -5,25 +5,75 @@ This module contains tests for validating the SSO-only Terraform infrastructure
 using a test-first approach for security and compliance validation.
 """
 
-import subprocess
-from pathlib import Path
+import os
+import re
+from types import SimpleNamespace
 from unittest.mock import patch
 
 import pytest
 
+# Common secret patterns ("access_key" is allowed by name; "secret_key" is
+# still caught by "secret")
+_SECRET_RE = re.compile(r"password|secret|token", re.IGNORECASE)
+
+# AWS S3 bucket naming rules: 3-63 chars of lowercase letters, digits, dots and
+# hyphens, starting and ending alphanumeric, no consecutive dots, not an IP
+_BUCKET_NAME_RE = re.compile(
+    r"(?!\d+\.\d+\.\d+\.\d+$)(?!.*\.\.)[a-z0-9][a-z0-9.-]{1,61}[a-z0-9]"
+)
+
+# References inside Terraform expressions
+_IAM_POLICY_REF_RE = re.compile(r"aws_iam_policy\.(\w+)")
+_POLICY_DOCUMENT_REF_RE = re.compile(r"data\.aws_iam_policy_document\.(\w+)")
+_VARIABLE_REF_RE = re.compile(r"\$\{var\.(\w+)\}")
+
+# AWS managed policies are opaque to these tests; their actions live in AWS
+_AWS_MANAGED_POLICY_PREFIX = "arn:aws:iam::aws:policy/"
+
+
+def _role_policy_arns(tf_config, role_name):
+    """Collect the policy ARN expressions attached to an IAM role."""
+    attachments = tf_config["resource"]["aws_iam_role_policy_attachment"]
+    return [
+        attachment["policy_arn"]
+        for attachment in attachments.values()
+        if f"aws_iam_role.{role_name}." in attachment["role"]
+    ]
+
+
+def _policy_actions(tf_config, expression):
+    """Collect the IAM actions granted by the customer policy an expression refers to."""
+    policy = _IAM_POLICY_REF_RE.search(expression)
+    if policy:
+        expression = tf_config["resource"]["aws_iam_policy"][policy.group(1)]["policy"]
+
+    document_ref = _POLICY_DOCUMENT_REF_RE.search(expression)
+    if document_ref is None:
+        pytest.fail(
+            f"Cannot resolve IAM actions from policy expression {expression!r}; "
+            "expected a data.aws_iam_policy_document reference"
+        )
+    document = tf_config["data"]["aws_iam_policy_document"][document_ref.group(1)]
+    return {
+        action
+        for statement in document.get("statement", [])
+        for action in statement.get("actions", [])
+    }
+
+
+@pytest.fixture(scope="session")
+def cp_success():
+    """Successful subprocess.run result shared by the mocked terraform calls."""
+    return SimpleNamespace(returncode=0, stdout="Success", stderr="")
+
 
 class TestTerraformValidation:
     """Test Terraform configuration validation."""
 
-    @pytest.fixture
-    def infra_dir(self):
+    @pytest.fixture(scope="class")
+    def infra_dir(self, project_root):
         """Get the infrastructure directory."""
-        return Path(__file__).parent.parent.parent / "infra"
-
-    @pytest.fixture
-    def terraform_files(self, infra_dir):
-        """Get list of Terraform files."""
-        return list(infra_dir.glob("*.tf"))
+        return project_root / "infra"
 
     def test_terraform_files_exist(self, infra_dir):
         """Test that required Terraform files exist."""
@@ -42,18 +92,15 @@ class TestTerraformValidation:
             "budget.tf",
         ]
 
-        for file_name in expected_files:
-            file_path = infra_dir / file_name
-            assert file_path.exists(), (
-                f"Required Terraform file {file_name} should exist"
-            )
+        present = {entry.name for entry in os.scandir(infra_dir)}
+        missing = set(expected_files) - present
+        assert not missing, f"Missing required Terraform files: {sorted(missing)}"
 
-    def test_sso_only_configuration(self, infra_dir):
+    def test_sso_only_configuration(self, tf_sources):
         """Test that infrastructure is configured for SSO-only access."""
-        iam_users_file = infra_dir / "iam-users-groups.tf"
+        content = tf_sources.get("iam-users-groups.tf")
 
-        if iam_users_file.exists():
-            content = iam_users_file.read_text()
+        if content is not None:
             # Should not contain actual IAM user resources
             assert 'resource "aws_iam_user"' not in content, (
                 "No IAM users should be defined"
@@ -64,12 +111,11 @@ class TestTerraformValidation:
             # Should reference SSO
             assert "SSO" in content, "File should reference SSO approach"
 
-    def test_sso_permission_sets_configured(self, infra_dir):
+    def test_sso_permission_sets_configured(self, tf_sources):
         """Test that SSO permission sets are properly configured."""
-        sso_file = infra_dir / "sso-permission-sets.tf"
+        content = tf_sources.get("sso-permission-sets.tf")
 
-        if sso_file.exists():
-            content = sso_file.read_text()
+        if content is not None:
             # Should contain permission set definition
             assert "aws_ssoadmin_permission_set" in content, (
                 "SSO permission set should be defined"
@@ -81,12 +127,11 @@ class TestTerraformValidation:
                 "Session duration should be configurable"
             )
 
-    def test_no_legacy_iam_variables(self, infra_dir):
+    def test_no_legacy_iam_variables(self, tf_sources):
         """Test that legacy IAM user variables are not present."""
-        variables_file = infra_dir / "variables.tf"
+        content = tf_sources.get("variables.tf")
 
-        if variables_file.exists():
-            content = variables_file.read_text()
+        if content is not None:
             # Should not contain legacy IAM variables
             assert "create_dev_user" not in content, (
                 "Legacy create_dev_user variable should not exist"
@@ -99,33 +144,32 @@ class TestTerraformValidation:
                 "SSO configuration variables should exist"
             )
 
-    def test_terraform_syntax_valid(self, infra_dir):
+    def test_terraform_syntax_valid(self, infra_dir, cp_success):
         """Test that Terraform configuration has valid syntax."""
         if not infra_dir.exists():
             pytest.skip("Infrastructure directory not found")
 
         # Mock terraform command for syntax validation
         with patch("subprocess.run") as mock_run:
-            mock_run.return_value.returncode = 0
-            mock_run.return_value.stdout = "Success! The configuration is valid."
+            mock_run.return_value = cp_success
 
             # This test will pass when real terraform validate succeeds
-            result = subprocess.run(
+            result = mock_run(
                 ["terraform", "validate"], cwd=infra_dir, capture_output=True, text=True
             )
             assert result.returncode == 0, (
                 f"Terraform validation failed: {result.stderr}"
             )
 
-    def test_terraform_format_check(self, infra_dir):
+    def test_terraform_format_check(self, infra_dir, cp_success):
         """Test that Terraform files are properly formatted."""
         if not infra_dir.exists():
             pytest.skip("Infrastructure directory not found")
 
         with patch("subprocess.run") as mock_run:
-            mock_run.return_value.returncode = 0
+            mock_run.return_value = cp_success
 
-            result = subprocess.run(
+            result = mock_run(
                 ["terraform", "fmt", "-check=true", "-diff=true"],
                 cwd=infra_dir,
                 capture_output=True,
@@ -139,29 +183,21 @@ class TestTerraformValidation:
 class TestS3SecurityConfiguration:
     """Test S3 bucket security configuration and policies."""
 
-    def test_s3_bucket_names_valid(self):
-        """Test that S3 bucket names follow AWS naming conventions."""
-        expected_buckets = [
+    @pytest.mark.parametrize(
+        "bucket_name",
+        [
             "slm-edge-dev-intents-raw",
             "slm-edge-dev-intents-processed",
             "slm-edge-dev-model-artifacts",
             "slm-edge-dev-edge-deployments",
             "slm-edge-dev-pipeline-artifacts",
-        ]
-
-        for bucket_name in expected_buckets:
-            # AWS S3 bucket naming rules
-            assert len(bucket_name) >= 3, f"Bucket name {bucket_name} too short"
-            assert len(bucket_name) <= 63, f"Bucket name {bucket_name} too long"
-            assert bucket_name.islower(), (
-                f"Bucket name {bucket_name} should be lowercase"
-            )
-            assert not bucket_name.startswith("-"), (
-                f"Bucket name {bucket_name} cannot start with hyphen"
-            )
-            assert not bucket_name.endswith("-"), (
-                f"Bucket name {bucket_name} cannot end with hyphen"
-            )
+        ],
+    )
+    def test_s3_bucket_names_valid(self, bucket_name):
+        """Test that S3 bucket names follow AWS naming conventions."""
+        assert _BUCKET_NAME_RE.fullmatch(bucket_name), (
+            f"Invalid S3 bucket name: {bucket_name}"
+        )
 
     def test_s3_bucket_versioning_enabled(self):
         """Test that S3 buckets have versioning enabled."""
@@ -231,9 +267,9 @@ class TestSSORoleConfiguration:
         # This validates that session duration is set correctly
         assert expected_session_duration == "PT8H"
 
-    def test_sso_permissions_include_required_actions(self):
-        """Test that SSO permission set includes required AWS actions."""
-        required_permissions = [
+    @pytest.mark.parametrize(
+        "permission",
+        [
             "sagemaker:CreateTrainingJob",
             "sagemaker:DescribeTrainingJob",
             "sagemaker:CreateModel",
@@ -244,11 +280,26 @@ class TestSSORoleConfiguration:
             "logs:CreateLogStream",
             "logs:PutLogEvents",
             "ecr:GetAuthorizationToken",
+        ],
+    )
+    def test_sso_permissions_include_required_actions(self, tf_config, permission):
+        """Test that SSO permission set includes required AWS actions."""
+        resources = tf_config["resource"]
+        expressions = [
+            attachment["inline_policy"]
+            for attachment in resources[
+                "aws_ssoadmin_permission_set_inline_policy"
+            ].values()
+        ] + [
+            reference["name"]
+            for attachment in resources[
+                "aws_ssoadmin_customer_managed_policy_attachment"
+            ].values()
+            for reference in attachment["customer_managed_policy_reference"]
         ]
 
-        # This test validates that the SSO permission set contains required permissions
-        for permission in required_permissions:
-            assert permission is not None, f"Permission {permission} should be included"
+        granted = set().union(*(_policy_actions(tf_config, e) for e in expressions))
+        assert permission in granted, f"Permission {permission} should be included"
 
     def test_sso_region_restrictions(self):
         """Test that SSO permissions are restricted to specific regions."""
@@ -266,22 +317,35 @@ class TestIAMServiceRoles:
         # This will validate the IAM role exists in terraform configuration
         assert expected_role_name is not None
 
-    def test_sagemaker_role_permissions(self):
-        """Test that SageMaker role has appropriate permissions."""
-        required_permissions = [
+    @pytest.mark.parametrize(
+        "permission",
+        [
             "s3:GetObject",
             "s3:PutObject",
             "s3:DeleteObject",
             "s3:ListBucket",
-            "sagemaker:*",
             "logs:CreateLogGroup",
             "logs:CreateLogStream",
             "logs:PutLogEvents",
+        ],
+    )
+    def test_sagemaker_role_permissions(self, tf_config, permission):
+        """Test that SageMaker role has appropriate permissions."""
+        expressions = [
+            arn
+            for arn in _role_policy_arns(tf_config, "sagemaker_execution_role")
+            if not arn.startswith(_AWS_MANAGED_POLICY_PREFIX)
         ]
 
-        # This test validates that the IAM policy contains required permissions
-        for permission in required_permissions:
-            assert permission is not None, f"Permission {permission} should be included"
+        granted = set().union(*(_policy_actions(tf_config, e) for e in expressions))
+        assert permission in granted, f"Permission {permission} should be included"
+
+    def test_sagemaker_role_managed_policies(self, tf_config):
+        """Test that SageMaker role has the SageMaker managed policy attached."""
+        policy_arns = _role_policy_arns(tf_config, "sagemaker_execution_role")
+        assert (
+            f"{_AWS_MANAGED_POLICY_PREFIX}AmazonSageMakerFullAccess" in policy_arns
+        ), "AmazonSageMakerFullAccess should be attached to the SageMaker role"
 
     def test_lambda_execution_role_exists(self):
         """Test that Lambda execution role is defined."""
@@ -309,33 +373,40 @@ class TestIAMServiceRoles:
 class TestResourceNamingAndTagging:
     """Test resource naming conventions and tagging strategy."""
 
-    def test_resource_naming_convention(self):
+    def test_resource_naming_convention(self, tf_config):
         """Test that resources follow consistent naming conventions."""
         # Project prefix should be consistent
-        project_prefix = "slm-edge"
-        environment = "dev"
-        expected_resources = [
-            f"{project_prefix}-{environment}-intents-raw",
-            f"{project_prefix}-{environment}-intents-processed",
-            f"{project_prefix}-{environment}-model-artifacts",
-            f"{project_prefix}-{environment}-edge-deployments",
-        ]
-
-        for resource in expected_resources:
-            assert resource.startswith(project_prefix), (
-                f"Resource {resource} should start with {project_prefix}"
+        variables = tf_config["variable"]
+        assert variables["project_name"]["default"] == "slm-edge"
+        assert variables["environment"]["default"] == "dev"
+
+        for name, bucket in tf_config["resource"]["aws_s3_bucket"].items():
+            bucket_name = bucket["bucket"]
+            assert bucket_name.startswith("${var.project_name}-"), (
+                f"Bucket {name} should start with the project name"
             )
-            assert environment in resource, (
-                f"Resource {resource} should contain environment {environment}"
+            assert "${var.environment}" in bucket_name, (
+                f"Bucket {name} should contain the environment"
             )
 
-    def test_required_tags_present(self):
+    def test_required_tags_present(self, tf_config):
         """Test that all resources have required tags."""
-        required_tags = ["Project", "Environment", "Owner", "CostCenter"]
+        required_tags = {"Project", "Environment", "Owner", "CostCenter"}
 
-        # This validates that terraform resources include required tags
-        for tag in required_tags:
-            assert tag is not None, f"Tag {tag} should be present on all resources"
+        # Provider default tags cover every resource; common tags cover merges
+        default_provider = next(
+            provider
+            for provider in tf_config["provider"]["aws"]
+            if "alias" not in provider
+        )
+        default_tags = default_provider["default_tags"][0]["tags"]
+        common_tags = tf_config["locals"]["common_tags"]
+        assert required_tags <= default_tags.keys(), (
+            f"Default tags missing {required_tags - default_tags.keys()}"
+        )
+        assert required_tags <= common_tags.keys(), (
+            f"Common tags missing {required_tags - common_tags.keys()}"
+        )
 
     def test_environment_specific_naming(self):
         """Test that resources are properly named for different environments."""
@@ -350,31 +421,19 @@ class TestResourceNamingAndTagging:
 class TestSecurityCompliance:
     """Test security compliance and best practices."""
 
-    def test_no_hardcoded_secrets(self, project_root):
+    def test_no_hardcoded_secrets(self, tf_sources):
         """Test that no hardcoded secrets or credentials exist."""
-        infra_dir = project_root / "infra"
-        if not infra_dir.exists():
+        if not tf_sources:
             pytest.skip("Infrastructure directory not found")
 
-        for tf_file in infra_dir.glob("*.tf"):
-            content = tf_file.read_text()
-            # Check for common secret patterns
-            secret_patterns = [
-                "password",
-                "secret",
-                "access_key",
-                "secret_key",
-                "token",
-            ]
-
-            for pattern in secret_patterns:
-                # Allow variable references but not hardcoded values
-                if pattern in content.lower():
-                    # Should be in variable references, not hardcoded
-                    assert "var." in content or pattern in [
-                        "access_key",
-                        "secret_key",
-                    ], f"Potential hardcoded secret in {tf_file.name}"
+        for file_name, content in tf_sources.items():
+            # Allow variable references but not hardcoded values
+            match = _SECRET_RE.search(content)
+            if match:
+                # Should be in variable references, not hardcoded
+                assert "var." in content, (
+                    f"Potential hardcoded secret ({match.group()!r}) in {file_name}"
+                )
 
     def test_encryption_enforced(self):
         """Test that encryption is enforced for data at rest and in transit."""
@@ -389,17 +448,18 @@ class TestSecurityCompliance:
                 f"Encryption requirement {requirement} should be enforced"
             )
 
-    def test_least_privilege_principles(self):
+    @pytest.mark.parametrize("permission", ["*:*", "s3:*", "iam:*"])
+    def test_least_privilege_principles(self, tf_sources, permission):
         """Test that least privilege principles are followed."""
-        # Verify that permissions are specific and not overly broad
-        overly_broad_permissions = ["*:*", "s3:*", "iam:*"]
-
-        # These permissions should not be used directly
-        for permission in overly_broad_permissions:
-            # Allow managed policies like ReadOnlyAccess but not custom broad permissions
-            assert permission is not None, (
-                f"Should avoid overly broad permission: {permission}"
-            )
+        # Allow managed policies like ReadOnlyAccess but not custom broad permissions
+        offenders = [
+            file_name
+            for file_name, content in tf_sources.items()
+            if f'"{permission}"' in content
+        ]
+        assert not offenders, (
+            f"Should avoid overly broad permission {permission} in {offenders}"
+        )
 
 
 class TestCostOptimization:
@@ -417,39 +477,59 @@ class TestCostOptimization:
             "Budget alerts should be configured"
         )
 
-    def test_s3_lifecycle_cost_optimization(self):
+    def test_s3_lifecycle_cost_optimization(self, tf_config):
         """Test that S3 lifecycle policies optimize costs."""
+        variables = tf_config["variable"]
         lifecycle_transitions = {
-            "standard_to_ia": 30,  # days
-            "ia_to_glacier": 90,  # days
-            "glacier_to_deep_archive": 365,  # days
+            "s3_lifecycle_days_to_ia": 30,  # days
+            "s3_lifecycle_days_to_glacier": 90,  # days
+            "s3_lifecycle_days_to_deep_archive": 365,  # days
         }
+        for variable, days in lifecycle_transitions.items():
+            assert variables[variable]["default"] == days, (
+                f"Lifecycle transition {variable} should default to {days} days"
+            )
 
-        for transition, days in lifecycle_transitions.items():
-            assert days > 0, f"Lifecycle transition {transition} should be configured"
+        lifecycle_configs = tf_config["resource"][
+            "aws_s3_bucket_lifecycle_configuration"
+        ]
+        for name, lifecycle in lifecycle_configs.items():
+            transitions = [
+                transition
+                for rule in lifecycle["rule"]
+                for transition in rule.get("transition", [])
+            ]
+            assert transitions, f"Bucket {name} should transition to cheaper storage"
+
+            # Resolve variable references (e.g. "${var.x}") to their defaults
+            days = [
+                variables[ref.group(1)]["default"]
+                if (ref := _VARIABLE_REF_RE.fullmatch(str(transition["days"])))
+                else int(transition["days"])
+                for transition in transitions
+            ]
+            assert days == sorted(set(days)), (
+                f"Bucket {name} transitions should move to colder storage over time"
+            )
 
 
-@pytest.mark.integration
 class TestTerraformPlan:
     """Integration tests for Terraform plan validation."""
 
-    def test_terraform_plan_succeeds(self):
+    def test_terraform_plan_succeeds(self, cp_success):
         """Test that terraform plan runs without errors."""
         # This test will be implemented to run actual terraform plan
         # For now, we mock the successful execution
         with patch("subprocess.run") as mock_run:
-            mock_run.return_value.returncode = 0
-            mock_run.return_value.stdout = "Plan: 15 to add, 0 to change, 0 to destroy."
+            mock_run.return_value = cp_success
 
             # Mock terraform plan execution
-            result = subprocess.run(
-                ["terraform", "plan"], capture_output=True, text=True
-            )
+            result = mock_run(["terraform", "plan"], capture_output=True, text=True)
             assert result.returncode == 0
 
-    def test_terraform_plan_output_valid(self):
-        """Test that terraform plan output contains expected resources."""
-        expected_resources = [
+    @pytest.mark.parametrize(
+        "resource_type",
+        [
             "aws_s3_bucket",
             "aws_s3_bucket_versioning",
             "aws_s3_bucket_server_side_encryption_configuration",
@@ -459,22 +539,24 @@ class TestTerraformPlan:
             "aws_ssoadmin_permission_set",
             "aws_kms_key",
             "aws_budgets_budget",
-        ]
-
-        # Mock plan output validation
-        for resource_type in expected_resources:
-            # In real implementation, this would parse actual terraform plan output
-            assert resource_type is not None
+        ],
+    )
+    def test_terraform_plan_output_valid(self, tf_sources, resource_type):
+        """Test that terraform plan output contains expected resources."""
+        # Until real plan output is parsed, check the configuration declares them
+        declaration = f'resource "{resource_type}"'
+        assert any(declaration in content for content in tf_sources.values()), (
+            f"Resource type {resource_type} should be declared"
+        )
 
-    def test_no_legacy_iam_resources_in_plan(self):
+    @pytest.mark.parametrize(
+        "resource_type",
+        ["aws_iam_user", "aws_iam_access_key", "aws_iam_group_membership"],
+    )
+    def test_no_legacy_iam_resources_in_plan(self, tf_sources, resource_type):
         """Test that terraform plan does not contain legacy IAM users."""
-        legacy_resources = [
-            "aws_iam_user",
-            "aws_iam_access_key",
-            "aws_iam_group_membership",
-        ]
-
-        # These resources should not appear in the plan
-        for resource_type in legacy_resources:
-            # In real implementation, this would verify these don't exist in plan
-            assert resource_type is not None  # Placeholder for actual implementation
+        # Until real plan output is parsed, check the configuration omits them
+        declaration = f'resource "{resource_type}"'
+        assert not any(declaration in content for content in tf_sources.values()), (
+            f"Legacy resource type {resource_type} should not be declared"
+        )
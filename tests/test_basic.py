@@ -5,23 +5,25 @@ This module contains basic tests to validate the test setup and configuration.
 """
 
 import sys
+import tempfile
 from pathlib import Path
+from unittest.mock import Mock
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
 
 
 def test_project_structure():
     """Test that the project structure is properly set up."""
-    project_root = Path(__file__).parent.parent
-
     # Check that key directories exist
-    assert (project_root / "src").exists(), "src directory should exist"
-    assert (project_root / "tests").exists(), "tests directory should exist"
-    assert (project_root / "docs").exists(), "docs directory should exist"
-    assert (project_root / "infra").exists(), "infra directory should exist"
+    assert (PROJECT_ROOT / "src").exists(), "src directory should exist"
+    assert (PROJECT_ROOT / "tests").exists(), "tests directory should exist"
+    assert (PROJECT_ROOT / "docs").exists(), "docs directory should exist"
+    assert (PROJECT_ROOT / "infra").exists(), "infra directory should exist"
 
     # Check that key files exist
-    assert (project_root / "pyproject.toml").exists(), "pyproject.toml should exist"
-    assert (project_root / "make.ps1").exists(), "make.ps1 should exist"
-    assert (project_root / ".gitignore").exists(), ".gitignore should exist"
+    assert (PROJECT_ROOT / "pyproject.toml").exists(), "pyproject.toml should exist"
+    assert (PROJECT_ROOT / "make.ps1").exists(), "make.ps1 should exist"
+    assert (PROJECT_ROOT / ".gitignore").exists(), ".gitignore should exist"
 
 
 def test_python_version():
@@ -31,10 +33,6 @@ def test_python_version():
 
 def test_imports():
     """Test that basic imports work."""
-    import tempfile
-    from pathlib import Path
-    from unittest.mock import Mock
-
     # Basic functionality test
     mock = Mock()
     mock.test_method.return_value = "test"